@@ -7,16 +7,61 @@ and difficulty scaling.
 """
 
 import random
-from enum import Enum
+from array import array
+from enum import IntEnum
 from typing import List, Tuple, Optional
 
 
-class Direction(Enum):
+# Direction codes; opposite directions differ only in the low bit
+UP, DOWN, LEFT, RIGHT = 0, 1, 2, 3
+
+# Per-direction (dx, dy) deltas indexed by direction code
+_DX = (0, 0, -1, 1)
+_DY = (-1, 1, 0, 0)
+
+
+class Direction(IntEnum):
     """Direction enumeration for snake movement."""
-    UP = (0, -1)
-    DOWN = (0, 1)
-    LEFT = (-1, 0)
-    RIGHT = (1, 0)
+    UP = UP
+    DOWN = DOWN
+    LEFT = LEFT
+    RIGHT = RIGHT
+
+
+# Occupancy bitmap flags
+_OCC_SNAKE = 1
+_OCC_OBSTACLE = 2
+
+# Outcomes of moving the head one cell
+_TICK_OK = 0
+_TICK_WALL = 1
+_TICK_SELF = 2
+_TICK_OBSTACLE = 3
+_TICK_FOOD = 4
+
+
+def _tick(occ: bytearray, food, nx: int, ny: int, width: int, height: int) -> int:
+    """
+    Classify the cell the snake head is about to enter.
+    
+    Kept free of game-object state so the per-tick hot path is a single
+    function call over plain values. Self and obstacle collisions are a
+    single byte load from the row-major occupancy bitmap.
+    
+    Returns:
+        One of the _TICK_* outcome codes.
+    """
+    if nx < 0 or nx >= width or ny < 0 or ny >= height:
+        return _TICK_WALL
+    
+    cell = occ[ny * width + nx]
+    if cell & _OCC_SNAKE:
+        return _TICK_SELF
+    if cell & _OCC_OBSTACLE:
+        return _TICK_OBSTACLE
+    if (nx, ny) == food:
+        return _TICK_FOOD
+    return _TICK_OK
 
 
 class SnakeGame:
@@ -40,14 +85,20 @@ class SnakeGame:
         self.game_over = False
         self.paused = False
         
-        # Snake: list of (x, y) tuples representing body segments
-        self.snake = [(width // 2, height // 2)]
-        self.direction = Direction.RIGHT
-        self.next_direction = Direction.RIGHT
+        # Snake: fixed-capacity ring buffer of flat cell indices (y * width + x).
+        # The head advances on every move and the tail follows unless food
+        # was eaten, so a tick never allocates or shifts segments.
+        self._reset_snake()
+        self.direction = RIGHT
+        self.next_direction = RIGHT
+        
+        # Occupancy bitmap (row-major, one byte per cell) mirroring
+        # the snake body and obstacles for O(1) collision checks
+        self._reset_occupancy()
         
         # Food and obstacles
-        self.food = self._generate_food()
         self.obstacles = []
+        self.food = self._generate_food()
         
         # Difficulty scaling
         self.difficulty_level = 1
@@ -57,36 +108,87 @@ class SnakeGame:
         # Game statistics
         self.ticks = 0
         
-    def _generate_food(self) -> Tuple[int, int]:
-        """Generate food at a random position not occupied by snake or obstacles."""
-        while True:
-            x = random.randint(0, self.width - 1)
-            y = random.randint(0, self.height - 1)
-            
-            # Ensure food doesn't spawn on snake or obstacles
-            if (x, y) not in self.snake and (x, y) not in self.obstacles:
-                return (x, y)
+    @property
+    def snake(self) -> List[Tuple[int, int]]:
+        """Snake body segments as (x, y) tuples, head first."""
+        cap = len(self._body)
+        return [
+            (cell % self.width, cell // self.width)
+            for cell in (self._body[(self._head - i) % cap] for i in range(self._len))
+        ]
+    
+    def _reset_snake(self):
+        """Place a single-segment snake in the centre of the board."""
+        self._body = array('i', [0]) * (self.width * self.height)
+        self._head = 0
+        self._tail = 0
+        self._len = 1
+        self._body[0] = (self.height // 2) * self.width + self.width // 2
+    
+    def _reset_occupancy(self):
+        """Clear the board bookkeeping and mark the snake's starting cell."""
+        self._occ = bytearray(self.width * self.height)
+        
+        # Free cells as flat indices, with each index's position in the
+        # list so a cell can be removed by swapping with the last entry
+        self._free_list = list(range(self.width * self.height))
+        self._free_pos = {idx: idx for idx in self._free_list}
+        
+        self._occupy(self._body[self._head], _OCC_SNAKE)
+    
+    def _occupy(self, idx: int, flag: int):
+        """Set an occupancy flag on a cell, taking it out of the free pool."""
+        if not self._occ[idx]:
+            pos = self._free_pos.pop(idx)
+            last = self._free_list.pop()
+            if last != idx:
+                self._free_list[pos] = last
+                self._free_pos[last] = pos
+        self._occ[idx] |= flag
+    
+    def _vacate(self, idx: int, flag: int):
+        """Clear an occupancy flag on a cell, returning it to the free pool if empty."""
+        if not self._occ[idx] & flag:
+            return
+        self._occ[idx] &= ~flag
+        if not self._occ[idx]:
+            self._free_pos[idx] = len(self._free_list)
+            self._free_list.append(idx)
+    
+    def _generate_food(self) -> Optional[Tuple[int, int]]:
+        """
+        Generate food at a random position not occupied by snake or obstacles.
+        
+        Samples directly from the free-cell pool, so the cost does not grow
+        as the board fills up. Returns None if no free cell is left.
+        """
+        if not self._free_list:
+            return None
+        
+        idx = random.choice(self._free_list)
+        return (idx % self.width, idx // self.width)
     
     def _generate_obstacles(self, count: int) -> List[Tuple[int, int]]:
-        """Generate obstacles at random positions not occupied by snake or food."""
-        obstacles = []
-        attempts = 0
-        max_attempts = 100
-        
-        while len(obstacles) < count and attempts < max_attempts:
-            x = random.randint(0, self.width - 1)
-            y = random.randint(0, self.height - 1)
-            
-            # Ensure obstacles don't spawn on snake or food
-            if (x, y) not in self.snake and (x, y) != self.food and (x, y) not in obstacles:
-                # Don't spawn obstacles too close to snake head
-                head_x, head_y = self.snake[0]
-                if abs(x - head_x) > 3 or abs(y - head_y) > 3:
-                    obstacles.append((x, y))
-            
-            attempts += 1
+        """
+        Generate obstacles at random positions not occupied by snake or food.
+        
+        Picks from the free-cell pool, so exactly count obstacles are
+        placed whenever enough valid cells exist.
+        """
+        width = self.width
+        head = self._body[self._head]
+        head_x, head_y = head % width, head // width
+        food_idx = self.food[1] * width + self.food[0] if self.food else -1
         
-        return obstacles
+        # Don't spawn obstacles on food or too close to snake head
+        valid = [
+            idx for idx in self._free_list
+            if idx != food_idx
+            and max(abs(idx % width - head_x), abs(idx // width - head_y)) > 3
+        ]
+        chosen = random.sample(valid, min(count, len(valid)))
+        
+        return [(idx % width, idx // width) for idx in chosen]
     
     def _update_difficulty(self):
         """Update game difficulty based on current score."""
@@ -102,7 +204,11 @@ class SnakeGame:
             # Add obstacles starting at difficulty 3 (150 points)
             if self.difficulty_level >= 3:
                 obstacle_count = min(2 + (self.difficulty_level - 3) * 2, 10)
+                for x, y in self.obstacles:
+                    self._vacate(y * self.width + x, _OCC_OBSTACLE)
                 self.obstacles = self._generate_obstacles(obstacle_count)
+                for x, y in self.obstacles:
+                    self._occupy(y * self.width + x, _OCC_OBSTACLE)
     
     def set_direction(self, direction: Direction):
         """
@@ -110,10 +216,8 @@ class SnakeGame:
         Prevents the snake from reversing into itself.
         """
         # Prevent reversing
-        current_x, current_y = self.direction.value
-        new_x, new_y = direction.value
-        
-        if (current_x + new_x, current_y + new_y) != (0, 0):
+        direction = int(direction)
+        if direction ^ 1 != self.direction:
             self.next_direction = direction
     
     def update(self) -> bool:
@@ -130,37 +234,36 @@ class SnakeGame:
         self.direction = self.next_direction
         
         # Calculate new head position
-        head_x, head_y = self.snake[0]
-        dx, dy = self.direction.value
-        new_head = (head_x + dx, new_head_y := head_y + dy)
-        
-        # Check wall collision
-        if new_head[0] < 0 or new_head[0] >= self.width or \
-           new_head[1] < 0 or new_head[1] >= self.height:
-            self.game_over = True
-            return False
+        head = self._body[self._head]
+        head_x, head_y = head % self.width, head // self.width
+        nx = head_x + _DX[self.direction]
+        ny = head_y + _DY[self.direction]
         
-        # Check self collision
-        if new_head in self.snake:
-            self.game_over = True
-            return False
-        
-        # Check obstacle collision
-        if new_head in self.obstacles:
+        # Check wall, self and obstacle collision
+        outcome = _tick(self._occ, self.food, nx, ny, self.width, self.height)
+        if outcome in (_TICK_WALL, _TICK_SELF, _TICK_OBSTACLE):
             self.game_over = True
             return False
         
         # Add new head
-        self.snake.insert(0, new_head)
+        cap = len(self._body)
+        new_head = ny * self.width + nx
+        self._head = (self._head + 1) % cap
+        self._body[self._head] = new_head
+        self._len += 1
+        self._occupy(new_head, _OCC_SNAKE)
         
         # Check food collision
-        if new_head == self.food:
+        if outcome == _TICK_FOOD:
             self.score += 10
             self.food = self._generate_food()
             self._update_difficulty()
         else:
             # Remove tail if no food eaten
-            self.snake.pop()
+            tail = self._body[self._tail]
+            self._tail = (self._tail + 1) % cap
+            self._len -= 1
+            self._vacate(tail, _OCC_SNAKE)
         
         return True
     
@@ -193,11 +296,12 @@ class SnakeGame:
         self.score = 0
         self.game_over = False
         self.paused = False
-        self.snake = [(self.width // 2, self.height // 2)]
-        self.direction = Direction.RIGHT
-        self.next_direction = Direction.RIGHT
-        self.food = self._generate_food()
+        self._reset_snake()
+        self.direction = RIGHT
+        self.next_direction = RIGHT
+        self._reset_occupancy()
         self.obstacles = []
+        self.food = self._generate_food()
         self.difficulty_level = 1
         self.speed = self.base_speed
         self.ticks = 0
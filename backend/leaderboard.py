@@ -5,42 +5,128 @@ Handles JSON-based leaderboard storage with thread-safe file operations
 and atomic writes to prevent data corruption.
 """
 
+import atexit
+import bisect
 import json
+import logging
+import os
+import sys
 import threading
 from pathlib import Path
-from datetime import datetime
-from typing import List, Dict, Optional
-import shutil
+from datetime import datetime, timezone
+from typing import List, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _name_key(player_name: str) -> str:
+    """
+    Case-insensitive key for a stored player name.
+    
+    Interned so every index shares one string object per player. Only
+    use it for names that are being stored; lookups should use a plain
+    lower() so untrusted probes are never interned.
+    """
+    return sys.intern(player_name.lower())
+
+
+def _sort_key(player: Dict) -> Tuple[int, str]:
+    """Leaderboard order: score descending, then name ascending."""
+    return (-player["best_score"], player["name"])
+
+
+def _atomic_json_write(path: Path, data: Dict):
+    """
+    Write JSON to a file atomically.
+    
+    Writes to a sibling temporary file, flushes it to disk, then
+    replaces the target with a single rename so readers never see
+    a partially written file.
+    
+    Args:
+        path: Destination file path.
+        data: JSON-serializable data to write.
+    """
+    temp_path = path.with_suffix('.tmp')
+    
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'), ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        
+        os.replace(temp_path, path)
+    except Exception:
+        # Clean up temp file if it exists
+        if temp_path.exists():
+            temp_path.unlink()
+        raise
 
 
 class LeaderboardManager:
     """
     Manages a JSON-based leaderboard with safe file operations.
     
-    Uses file locking and atomic writes to ensure data consistency
-    across concurrent operations.
+    Writers are serialized by a lock and publish an immutable snapshot
+    of the sorted players; readers use the latest snapshot without
+    locking. Changes are flushed to disk by a background thread at most
+    once per flush interval, using atomic writes to keep the file
+    consistent.
+    
+    The file is read only once, at construction, so a single process
+    must own it: run the API with one worker, since separate processes
+    would overwrite each other's scores.
     """
 
-    def __init__(self, filepath: str = "leaderboard.json"):
+    def __init__(self, filepath: str = "leaderboard.json", flush_interval: float = 0.25):
         """
         Initialize the leaderboard manager.
         
         Args:
             filepath: Path to the leaderboard JSON file.
+            flush_interval: Seconds to batch changes before writing them to disk.
         """
         self.filepath = Path(filepath)
-        self.lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+        self._flush_interval = flush_interval
         
         # Create leaderboard file if it doesn't exist
         if not self.filepath.exists():
             self._initialize_leaderboard()
+        
+        # Load once; the in-memory copy is canonical from here on and
+        # the file is only touched again when the leaderboard changes.
+        self._players: List[Dict] = self._read_leaderboard()["players"]
+        self._players.sort(key=_sort_key)
+        self._by_name_lower: Dict[str, Dict] = {
+            _name_key(p["name"]): p for p in self._players
+        }
+        self._rank_by_name: Dict[str, int] = {}
+        self._reindex_ranks()
+        self._snapshot: Tuple[Dict, ...] = tuple(self._players)
+        self._version = 0
+        
+        # Debounced persistence; anything still pending is written by
+        # close(), or at interpreter exit if close() was never called
+        self._flusher = threading.Thread(
+            target=self._flush_loop, name="leaderboard-flush", daemon=True
+        )
+        self._flusher.start()
+        atexit.register(self.flush)
+    
+    @property
+    def version(self) -> int:
+        """Counter bumped on every leaderboard change, usable as a cache key."""
+        return self._version
     
     def _initialize_leaderboard(self):
         """Create an empty leaderboard file."""
-        with self.lock:
-            self.filepath.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.filepath, 'w') as f:
-                json.dump({"players": []}, f, indent=2)
+        self.filepath.parent.mkdir(parents=True, exist_ok=True)
+        _atomic_json_write(self.filepath, {"players": []})
     
     def _read_leaderboard(self) -> Dict:
         """
@@ -50,7 +136,7 @@ class LeaderboardManager:
             Leaderboard dictionary.
         """
         try:
-            with open(self.filepath, 'r') as f:
+            with open(self.filepath, 'r', encoding='utf-8') as f:
                 return json.load(f)
         except (FileNotFoundError, json.JSONDecodeError):
             return {"players": []}
@@ -65,20 +151,70 @@ class LeaderboardManager:
         Args:
             data: Leaderboard dictionary to write.
         """
-        temp_filepath = self.filepath.with_suffix('.tmp')
+        _atomic_json_write(self.filepath, data)
+    
+    def _flush_loop(self):
+        """Background loop that writes pending changes, batched per flush interval."""
+        while True:
+            self._wake.wait()
+            
+            # Let further changes accumulate; close() cuts the wait short
+            # and does the final flush itself
+            if self._closed.wait(self._flush_interval):
+                return
+            
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error writing leaderboard: {e}")
+                # Retry on the next interval
+                self._wake.set()
+    
+    def flush(self):
+        """
+        Write pending leaderboard changes to disk immediately.
         
-        try:
-            # Write to temporary file
-            with open(temp_filepath, 'w') as f:
-                json.dump(data, f, indent=2)
+        Does nothing if there are no unsaved changes. If the write fails,
+        the changes stay pending and the error is re-raised.
+        """
+        with self._flush_lock:
+            if not self._dirty.is_set():
+                return
             
-            # Atomic replace
-            shutil.move(str(temp_filepath), str(self.filepath))
-        except Exception as e:
-            # Clean up temp file if it exists
-            if temp_filepath.exists():
-                temp_filepath.unlink()
-            raise e
+            # Clear before snapshotting so a concurrent submission marks
+            # the state dirty again and is picked up by the next flush
+            self._dirty.clear()
+            try:
+                self._write_leaderboard({"players": list(self._snapshot)})
+            except Exception:
+                self._dirty.set()
+                raise
+    
+    def close(self):
+        """
+        Stop the background flush thread and write any pending changes.
+        
+        Safe to call more than once.
+        """
+        self._closed.set()
+        self._wake.set()
+        self._flusher.join()
+        atexit.unregister(self.flush)
+        self.flush()
+    
+    def _reindex_ranks(self, start: int = 0, stop: Optional[int] = None):
+        """
+        Refresh cached ranks for players in a range of positions.
+        
+        Args:
+            start: Index in the sorted player list to start from.
+            stop: Index to stop before; defaults to the end of the list.
+        """
+        if stop is None:
+            stop = len(self._players)
+        for idx in range(start, stop):
+            self._rank_by_name[_name_key(self._players[idx]["name"])] = idx + 1
     
     def submit_score(self, player_name: str, score: int, time_taken: int = 0) -> bool:
         """
@@ -94,42 +230,66 @@ class LeaderboardManager:
         Returns:
             True if leaderboard was updated, False otherwise.
         """
-        with self.lock:
-            leaderboard = self._read_leaderboard()
-            
+        updated, _, _ = self.submit_score_and_rank(player_name, score, time_taken)
+        return updated
+    
+    def submit_score_and_rank(
+        self, player_name: str, score: int, time_taken: int = 0
+    ) -> Tuple[bool, bool, Optional[int]]:
+        """
+        Submit a score and report the outcome in a single locked step.
+        
+        Only updates if the new score is higher than the existing best score.
+        
+        Args:
+            player_name: Name of the player.
+            score: Score to submit.
+            time_taken: Time taken to achieve the score (in seconds).
+        
+        Returns:
+            Tuple of (updated, new_personal_best, rank), where rank is the
+            player's 1-indexed position after the submission.
+        """
+        key = _name_key(player_name)
+        
+        with self._write_lock:
             # Find existing player
-            player = None
-            for p in leaderboard["players"]:
-                if p["name"].lower() == player_name.lower():
-                    player = p
-                    break
+            existing = self._by_name_lower.get(key)
             
             # Check if new score is better
-            if player:
-                if score <= player["best_score"]:
-                    return False
-                
-                # Update existing player
-                player["best_score"] = score
-                player["date"] = datetime.utcnow().isoformat()
-                player["time_taken"] = time_taken
+            if existing and score <= existing["best_score"]:
+                return False, False, self._rank_by_name.get(key)
+            
+            # Build a fresh record so readers holding the old snapshot
+            # never see a half-updated entry
+            player = {
+                "name": existing["name"] if existing else player_name,
+                "best_score": score,
+                "date": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                "time_taken": time_taken
+            }
+            
+            # The list stays sorted, so the record only moves up: drop the
+            # old entry and insert the new one at its sorted position.
+            # Only ranks between those two positions change.
+            if existing:
+                old_idx = self._rank_by_name[key] - 1
+                del self._players[old_idx]
+                stop = old_idx + 1
             else:
-                # Add new player
-                leaderboard["players"].append({
-                    "name": player_name,
-                    "best_score": score,
-                    "date": datetime.utcnow().isoformat(),
-                    "time_taken": time_taken
-                })
+                stop = None
             
-            # Sort by score descending
-            leaderboard["players"].sort(
-                key=lambda p: (-p["best_score"], p["name"])
-            )
+            new_idx = bisect.bisect_left(self._players, _sort_key(player), key=_sort_key)
+            self._players.insert(new_idx, player)
+            self._by_name_lower[key] = player
+            self._reindex_ranks(new_idx, stop)
+            self._snapshot = tuple(self._players)
+            self._version += 1
             
-            # Write back
-            self._write_leaderboard(leaderboard)
-            return True
+            # Persisted asynchronously by the flush thread
+            self._dirty.set()
+            self._wake.set()
+            return True, True, self._rank_by_name.get(key)
     
     def get_leaderboard(self, top_n: int = 10) -> List[Dict]:
         """
@@ -141,16 +301,8 @@ class LeaderboardManager:
         Returns:
             List of player dictionaries sorted by score.
         """
-        with self.lock:
-            leaderboard = self._read_leaderboard()
-            
-            # Sort by score descending, then by name ascending
-            players = sorted(
-                leaderboard["players"],
-                key=lambda p: (-p["best_score"], p["name"])
-            )
-            
-            return players[:top_n]
+        # Kept sorted by score descending, then by name ascending
+        return list(self._snapshot[:top_n])
     
     def get_player_best_score(self, player_name: str) -> Optional[Dict]:
         """
@@ -162,14 +314,7 @@ class LeaderboardManager:
         Returns:
             Player dictionary or None if not found.
         """
-        with self.lock:
-            leaderboard = self._read_leaderboard()
-            
-            for player in leaderboard["players"]:
-                if player["name"].lower() == player_name.lower():
-                    return player
-            
-            return None
+        return self._by_name_lower.get(player_name.lower())
     
     def get_player_rank(self, player_name: str) -> Optional[int]:
         """
@@ -181,19 +326,7 @@ class LeaderboardManager:
         Returns:
             Rank (1-indexed) or None if not found.
         """
-        with self.lock:
-            leaderboard = self._read_leaderboard()
-            
-            players = sorted(
-                leaderboard["players"],
-                key=lambda p: (-p["best_score"], p["name"])
-            )
-            
-            for rank, player in enumerate(players, 1):
-                if player["name"].lower() == player_name.lower():
-                    return rank
-            
-            return None
+        return self._rank_by_name.get(player_name.lower())
     
     def get_all_players(self) -> List[Dict]:
         """
@@ -202,12 +335,4 @@ class LeaderboardManager:
         Returns:
             List of all player dictionaries.
         """
-        with self.lock:
-            leaderboard = self._read_leaderboard()
-            
-            players = sorted(
-                leaderboard["players"],
-                key=lambda p: (-p["best_score"], p["name"])
-            )
-            
-            return players
+        return list(self._snapshot)
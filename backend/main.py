@@ -5,12 +5,19 @@ Provides REST API endpoints for game sessions, score submission,
 and leaderboard management.
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from typing import List, Optional
-from datetime import datetime
+from fastapi.responses import ORJSONResponse
+from starlette.datastructures import State
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Dict, List, Optional, Tuple
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from functools import lru_cache
 import logging
+import time
+
+import orjson
 
 from leaderboard import LeaderboardManager
 
@@ -18,16 +25,35 @@ from leaderboard import LeaderboardManager
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Load the leaderboard before serving and persist it on shutdown.
+    
+    The default top-10 response is built up front so the first
+    request after a deploy doesn't pay for it.
+    """
+    leaderboard_manager = LeaderboardManager("leaderboard.json")
+    app.state.leaderboard_manager = leaderboard_manager
+    app.state.top_leaderboard_cache = None
+    _top_leaderboard_body(app.state, 10)
+    
+    yield
+    
+    app.state.top_leaderboard_cache = None
+    leaderboard_manager.close()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Snake Game API",
     description="Advanced Snake Game Backend",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
-# Initialize leaderboard manager
-leaderboard_manager = LeaderboardManager("leaderboard.json")
-
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -43,12 +69,11 @@ class GameSessionRequest(BaseModel):
     """Request to start a new game session."""
     player_name: str = Field(..., min_length=1, max_length=50)
     
-    class Config:
-        schema_extra = {
-            "example": {
-                "player_name": "John Doe"
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "player_name": "John Doe"
         }
+    })
 
 
 class ScoreSubmissionRequest(BaseModel):
@@ -58,15 +83,14 @@ class ScoreSubmissionRequest(BaseModel):
     difficulty_level: int = Field(default=1, ge=1, le=10)
     time_taken: int = Field(default=0, ge=0)  # Time in seconds
     
-    class Config:
-        schema_extra = {
-            "example": {
-                "player_name": "John Doe",
-                "score": 250,
-                "difficulty_level": 3,
-                "time_taken": 120
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "player_name": "John Doe",
+            "score": 250,
+            "difficulty_level": 3,
+            "time_taken": 120
         }
+    })
 
 
 class ScoreSubmissionResponse(BaseModel):
@@ -76,15 +100,14 @@ class ScoreSubmissionResponse(BaseModel):
     leaderboard_position: Optional[int] = None
     new_personal_best: bool = False
     
-    class Config:
-        schema_extra = {
-            "example": {
-                "success": True,
-                "message": "Score submitted successfully",
-                "leaderboard_position": 5,
-                "new_personal_best": True
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "success": True,
+            "message": "Score submitted successfully",
+            "leaderboard_position": 5,
+            "new_personal_best": True
         }
+    })
 
 
 class PlayerLeaderboardEntry(BaseModel):
@@ -95,16 +118,15 @@ class PlayerLeaderboardEntry(BaseModel):
     time_taken: int = 0  # Time in seconds
     rank: Optional[int] = None
     
-    class Config:
-        schema_extra = {
-            "example": {
-                "name": "John Doe",
-                "best_score": 500,
-                "date": "2026-02-03T10:30:45.123456",
-                "time_taken": 120,
-                "rank": 1
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "name": "John Doe",
+            "best_score": 500,
+            "date": "2026-02-03T10:30:45+00:00",
+            "time_taken": 120,
+            "rank": 1
         }
+    })
 
 
 class LeaderboardResponse(BaseModel):
@@ -112,26 +134,25 @@ class LeaderboardResponse(BaseModel):
     entries: List[PlayerLeaderboardEntry]
     total_count: int
     
-    class Config:
-        schema_extra = {
-            "example": {
-                "entries": [
-                    {
-                        "name": "Alice",
-                        "best_score": 1000,
-                        "date": "2026-02-03T10:30:45.123456",
-                        "rank": 1
-                    },
-                    {
-                        "name": "Bob",
-                        "best_score": 850,
-                        "date": "2026-02-02T15:20:30.654321",
-                        "rank": 2
-                    }
-                ],
-                "total_count": 2
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "entries": [
+                {
+                    "name": "Alice",
+                    "best_score": 1000,
+                    "date": "2026-02-03T10:30:45+00:00",
+                    "rank": 1
+                },
+                {
+                    "name": "Bob",
+                    "best_score": 850,
+                    "date": "2026-02-02T15:20:30+00:00",
+                    "rank": 2
+                }
+            ],
+            "total_count": 2
         }
+    })
 
 
 class PlayerBestScoreResponse(BaseModel):
@@ -143,17 +164,16 @@ class PlayerBestScoreResponse(BaseModel):
     time_taken: Optional[int] = None
     rank: Optional[int] = None
     
-    class Config:
-        schema_extra = {
-            "example": {
-                "found": True,
-                "player_name": "John Doe",
-                "best_score": 500,
-                "date": "2026-02-03T10:30:45.123456",
-                "time_taken": 120,
-                "rank": 3
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "found": True,
+            "player_name": "John Doe",
+            "best_score": 500,
+            "date": "2026-02-03T10:30:45+00:00",
+            "time_taken": 120,
+            "rank": 3
         }
+    })
 
 
 class GameSessionResponse(BaseModel):
@@ -162,14 +182,13 @@ class GameSessionResponse(BaseModel):
     player_name: str
     message: str
     
-    class Config:
-        schema_extra = {
-            "example": {
-                "session_id": "session_123456",
-                "player_name": "John Doe",
-                "message": "Game session started"
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "session_id": "session_123456",
+            "player_name": "John Doe",
+            "message": "Game session started"
         }
+    })
 
 
 class HealthCheckResponse(BaseModel):
@@ -177,13 +196,62 @@ class HealthCheckResponse(BaseModel):
     status: str
     timestamp: str
     
-    class Config:
-        schema_extra = {
-            "example": {
-                "status": "healthy",
-                "timestamp": "2026-02-03T10:30:45.123456"
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "status": "healthy",
+            "timestamp": "2026-02-03T10:30:45+00:00"
         }
+    })
+
+
+# ==================== Helpers ====================
+
+@lru_cache(maxsize=1)
+def _utc_timestamp(second: int) -> str:
+    """Format a Unix second as an ISO 8601 UTC string, reused within the same second."""
+    return datetime.fromtimestamp(second, timezone.utc).isoformat()
+
+
+def _ranked_entries(players: List[Dict]) -> List[Dict]:
+    """
+    Add rank to each leaderboard entry.
+    
+    Stored entries are already trusted, so they are copied as plain
+    dicts rather than revalidated through the response models.
+    """
+    return [
+        {**player, "rank": idx + 1, "time_taken": player.get("time_taken", 0)}
+        for idx, player in enumerate(players)
+    ]
+
+
+def _top_leaderboard_body(state: State, limit: int) -> Tuple[bytes, int]:
+    """
+    Serialize the top N leaderboard response.
+    
+    The last result is kept on the app state alongside the leaderboard
+    version and limit it was built for, so repeated polls between score
+    changes reuse the same bytes and any change invalidates them.
+    
+    Returns:
+        Tuple of (JSON body, number of entries).
+    """
+    leaderboard_manager = state.leaderboard_manager
+    version = leaderboard_manager.version
+    
+    cached = state.top_leaderboard_cache
+    if cached is not None and cached[0] == version and cached[1] == limit:
+        return cached[2], cached[3]
+    
+    entries = _ranked_entries(leaderboard_manager.get_leaderboard(limit))
+    body = orjson.dumps({"entries": entries, "total_count": len(entries)})
+    state.top_leaderboard_cache = (version, limit, body, len(entries))
+    return body, len(entries)
+
+
+def get_leaderboard_manager(request: Request) -> LeaderboardManager:
+    """Dependency returning the leaderboard manager created at startup."""
+    return request.app.state.leaderboard_manager
 
 
 # ==================== API Endpoints ====================
@@ -198,7 +266,7 @@ async def health_check():
     """
     return {
         "status": "healthy",
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": _utc_timestamp(int(time.time()))
     }
 
 
@@ -226,7 +294,7 @@ async def start_game(request: GameSessionRequest):
             )
         
         # Generate session ID (in production, use proper session management)
-        session_id = f"session_{datetime.utcnow().timestamp()}_{player_name}"
+        session_id = f"session_{time.time()}_{player_name}"
         
         logger.info(f"Game started for player: {player_name}")
         
@@ -244,7 +312,10 @@ async def start_game(request: GameSessionRequest):
 
 
 @app.post("/scores/submit", response_model=ScoreSubmissionResponse)
-async def submit_score(request: ScoreSubmissionRequest):
+async def submit_score(
+    request: ScoreSubmissionRequest,
+    leaderboard_manager: LeaderboardManager = Depends(get_leaderboard_manager)
+):
     """
     Submit a score to the leaderboard.
     
@@ -272,15 +343,10 @@ async def submit_score(request: ScoreSubmissionRequest):
                 detail="Score cannot be negative"
             )
         
-        # Check if this is a new personal best
-        existing_player = leaderboard_manager.get_player_best_score(player_name)
-        new_personal_best = existing_player is None or request.score > existing_player["best_score"]
-        
-        # Submit score with time taken
-        updated = leaderboard_manager.submit_score(player_name, request.score, request.time_taken)
-        
-        # Get updated rank
-        rank = leaderboard_manager.get_player_rank(player_name)
+        # Submit score with time taken and get the updated rank
+        updated, new_personal_best, rank = leaderboard_manager.submit_score_and_rank(
+            player_name, request.score, request.time_taken
+        )
         
         logger.info(
             f"Score submitted - Player: {player_name}, "
@@ -301,8 +367,12 @@ async def submit_score(request: ScoreSubmissionRequest):
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-@app.get("/leaderboard/top", response_model=LeaderboardResponse)
-async def get_leaderboard(limit: int = 10):
+@app.get(
+    "/leaderboard/top",
+    response_model=None,
+    responses={200: {"model": LeaderboardResponse}}
+)
+async def get_leaderboard(request: Request, limit: int = 10):
     """
     Get top N leaderboard entries.
     
@@ -322,26 +392,11 @@ async def get_leaderboard(limit: int = 10):
                 detail="Limit must be between 1 and 100"
             )
         
-        players = leaderboard_manager.get_leaderboard(limit)
-        
-        # Add rank to each entry
-        entries = [
-            PlayerLeaderboardEntry(
-                name=player["name"],
-                best_score=player["best_score"],
-                date=player["date"],
-                time_taken=player.get("time_taken", 0),
-                rank=idx + 1
-            )
-            for idx, player in enumerate(players)
-        ]
+        body, count = _top_leaderboard_body(request.app.state, limit)
         
-        logger.info(f"Leaderboard fetched - Top {len(entries)} entries")
+        logger.info(f"Leaderboard fetched - Top {count} entries")
         
-        return {
-            "entries": entries,
-            "total_count": len(entries)
-        }
+        return Response(content=body, media_type="application/json")
     
     except HTTPException:
         raise
@@ -351,7 +406,10 @@ async def get_leaderboard(limit: int = 10):
 
 
 @app.get("/leaderboard/player/{player_name}", response_model=PlayerBestScoreResponse)
-async def get_player_best_score(player_name: str):
+async def get_player_best_score(
+    player_name: str,
+    leaderboard_manager: LeaderboardManager = Depends(get_leaderboard_manager)
+):
     """
     Get the best score for a specific player.
     
@@ -400,8 +458,14 @@ async def get_player_best_score(player_name: str):
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-@app.get("/leaderboard/all", response_model=LeaderboardResponse)
-async def get_all_leaderboard():
+@app.get(
+    "/leaderboard/all",
+    response_model=None,
+    responses={200: {"model": LeaderboardResponse}}
+)
+async def get_all_leaderboard(
+    leaderboard_manager: LeaderboardManager = Depends(get_leaderboard_manager)
+):
     """
     Get all leaderboard entries (paginated).
     
@@ -411,15 +475,7 @@ async def get_all_leaderboard():
     try:
         players = leaderboard_manager.get_all_players()
         
-        entries = [
-            PlayerLeaderboardEntry(
-                name=player["name"],
-                best_score=player["best_score"],
-                date=player["date"],
-                rank=idx + 1
-            )
-            for idx, player in enumerate(players)
-        ]
+        entries = _ranked_entries(players)
         
         logger.info(f"All leaderboard entries fetched - Total: {len(entries)}")
         